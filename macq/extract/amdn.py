@@ -1,24 +1,29 @@
 """.. include:: ../../docs/templates/extract/amdn.md"""
 
-from macq.trace import Fluent, Action  # for typing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from threading import Lock
+from macq.trace import Fluent, Action, State  # for typing
 from macq.extract.learned_action import LearnedAction
 from nnf.operators import implies
 
 import macq.extract as extract
-from typing import Dict, List, Optional, Union, Hashable
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union, Hashable
 from nnf import Aux, Var, And, Or
 from bauhaus import Encoding  # only used for pretty printing in debug mode
 from .exceptions import (
     IncompatibleObservationToken,
 )
 from .model import Model
-from ..trace import ActionPair
 from ..observation import NoisyPartialDisorderedParallelObservation, ObservedTraceList
 from ..utils.pysat import to_wcnf, extract_raw_model
 
 e = Encoding
 
 
+@lru_cache(maxsize=None)
 def pre(r: Fluent, act: Action):
     """Create a Var that enforces that the given fluent is a precondition of the given action.
 
@@ -33,6 +38,7 @@ def pre(r: Fluent, act: Action):
     return Var("(" + str(r)[1:-1] + " is a precondition of " + act.details() + ")")
 
 
+@lru_cache(maxsize=None)
 def add(r: Fluent, act: Action):
     """Create a Var that enforces that the given fluent is an add effect of the given action.
 
@@ -47,6 +53,7 @@ def add(r: Fluent, act: Action):
     return Var("(" + str(r)[1:-1] + " is added by " + act.details() + ")")
 
 
+@lru_cache(maxsize=None)
 def delete(r: Fluent, act: Action):
     """Create a Var that enforces that the given fluent is a delete effect of the given action.
 
@@ -61,7 +68,174 @@ def delete(r: Fluent, act: Action):
     return Var("(" + str(r)[1:-1] + " is deleted by " + act.details() + ")")
 
 
+# the number of extractions using the caches of `pre`, `add` and `delete`
+_var_cache_users = 0
+_var_cache_lock = Lock()
+
+
+@contextmanager
+def _cached_vars():
+    """Keeps the variables built by `pre`, `add` and `delete` cached for the duration of an extraction.
+
+    The caches are cleared once the last extraction using them is done, whether or not it succeeded, so
+    that they do not keep the fluents and actions alive, and concurrent extractions do not clear them for
+    each other.
+    """
+    global _var_cache_users
+    with _var_cache_lock:
+        _var_cache_users += 1
+    try:
+        yield
+    finally:
+        with _var_cache_lock:
+            _var_cache_users -= 1
+            if not _var_cache_users:
+                for var_builder in (pre, add, delete):
+                    var_builder.cache_clear()
+
+
 WMAX = 1
+# probabilities at or below this are treated as zero when weighing disorder constraints
+EPS = 1e-12
+
+
+class _Hard:
+    """The weight of hard constraints."""
+
+    def __repr__(self):
+        return "HARD"
+
+    def __reduce__(self):
+        # unpickle as the module's singleton, so constraints built in worker processes stay hard
+        return "_HARD"
+
+
+# hard constraints are weighted with this singleton, so they can be told apart with `is`
+_HARD = _Hard()
+
+
+def _count_occurrences(
+    occurrences: np.ndarray, action_ids: np.ndarray, state_matrix: np.ndarray
+):
+    """Adds each row of a state matrix to the occurrence counts of the corresponding action.
+
+    Args:
+        occurrences (np.ndarray):
+            The (action x proposition) occurrence counts to update.
+        action_ids (np.ndarray):
+            The action (row of `occurrences`) that each row of the state matrix is counted for.
+        state_matrix (np.ndarray):
+            The boolean state matrix to count the true propositions of.
+    """
+    for i in range(state_matrix.shape[0]):
+        for r in range(state_matrix.shape[1]):
+            if state_matrix[i, r]:
+                occurrences[action_ids[i], r] += 1
+
+
+@lru_cache(maxsize=None)
+def _occurrence_counter():
+    """Returns `_count_occurrences` compiled with Numba, falling back to `np.add.at` without Numba.
+
+    Numba is only imported, and the kernel only compiled, the first time occurrences are counted.
+    """
+    try:
+        from numba import njit
+    except ModuleNotFoundError:
+        return np.add.at
+    # not parallel=True: the threads of Numba's threading layer keep the interpreter from exiting
+    # once a process pool has been used (see `_map_traces`)
+    return njit(cache=True)(_count_occurrences)
+
+
+def _cnf_pg(or_of_ands: Or[And[Var]]):
+    """Converts a disjunction of conjunctions of literals to CNF using the Plaisted-Greenbaum encoding.
+
+    Each conjunction gets an auxiliary variable that implies each of its literals, and the top-level
+    clause is the disjunction of the auxiliary variables. As the conjunctions only appear positively,
+    the clauses that would make each conjunction imply its auxiliary variable (as in the Tseitin
+    encoding) are not needed.
+
+    Args:
+        or_of_ands (Or[And[Var]]):
+            The disjunction of conjunctions to convert.
+
+    Returns:
+        The CNF formula.
+    """
+    clauses = []
+    top_clause = []
+    for conjunction in or_of_ands.children:
+        aux = Var.aux()
+        top_clause.append(aux)
+        for lit in conjunction.children:
+            clauses.append(Or([~aux, lit]))
+    clauses.append(Or(top_clause))
+    return And(clauses)
+
+
+# The CNF of the disorder constraint of an (earlier, later) action pair for a single proposition.
+# Every disorder constraint has this shape, so it is only converted to CNF once; the placeholder
+# variables are named `(kind, i)`, where `kind` is one of "_pre", "_add" or "_del" and `i` is 0 for
+# the earlier action and 1 for the later one.
+DISORDER_SHAPE = _cnf_pg(
+    Or(
+        [
+            And([Var(("_pre", 0)), ~Var(("_del", 0)), Var(("_del", 1))]),
+            And([Var(("_add", 0)), Var(("_pre", 1))]),
+            And([Var(("_add", 0)), Var(("_del", 1))]),
+            And([Var(("_del", 0)), Var(("_add", 1))]),
+        ]
+    )
+)
+
+
+# arguments shared by all traces, set once in each worker process by `_set_shared_args`
+_shared_args = ()
+
+
+def _set_shared_args(*args):
+    """Stores the arguments shared by all traces in a worker process."""
+    global _shared_args
+    _shared_args = args
+
+
+def _build_trace(build_trace: Callable, par_act_sets: List[Set[Action]]):
+    """Builds the constraints of a single trace in a worker process."""
+    return build_trace(par_act_sets, *_shared_args)
+
+
+def _map_traces(
+    build_trace: Callable,
+    all_par_act_sets: List[List[Set[Action]]],
+    workers: int,
+    *args,
+):
+    """Builds the constraints of each trace, as `build_trace(par_act_sets, *args)`.
+
+    Traces are independent of one another, so when more than one worker is requested they are
+    built in a pool of processes. The shared arguments are sent to each process once, rather
+    than with every trace.
+
+    Args:
+        build_trace (Callable):
+            The function that builds the constraints of a single trace.
+        all_par_act_sets (List[List[Set[Action]]]):
+            The parallel action sets of each trace.
+        workers (int):
+            The number of processes to use.
+        *args:
+            The arguments shared by all traces.
+
+    Returns:
+        The constraints of each trace.
+    """
+    if workers <= 1:
+        return [build_trace(par_act_sets, *args) for par_act_sets in all_par_act_sets]
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_set_shared_args, initargs=args
+    ) as executor:
+        return list(executor.map(partial(_build_trace, build_trace), all_par_act_sets))
 
 
 class AMDN:
@@ -70,6 +244,7 @@ class AMDN:
         obs_tracelist: ObservedTraceList,
         debug: bool = False,
         occ_threshold: int = 1,
+        workers: int = 1,
     ):
         """Creates a new Model object.
 
@@ -80,6 +255,9 @@ class AMDN:
                 Optional debugging mode.
             occ_threshold (int):
                 Threshold to be used for noise constraints.
+            workers (int):
+                Optional; The number of processes used to build the constraints of the
+                traces in parallel. Defaults to 1 (no parallelism).
 
         Raises:
             IncompatibleObservationToken:
@@ -88,10 +266,12 @@ class AMDN:
         if obs_tracelist.type is not NoisyPartialDisorderedParallelObservation:
             raise IncompatibleObservationToken(obs_tracelist.type, AMDN)
 
-        return AMDN._amdn(obs_tracelist, debug, occ_threshold)
+        return AMDN._amdn(obs_tracelist, debug, occ_threshold, workers)
 
     @staticmethod
-    def _amdn(obs_tracelist: ObservedTraceList, debug: bool, occ_threshold: int):
+    def _amdn(
+        obs_tracelist: ObservedTraceList, debug: bool, occ_threshold: int, workers: int
+    ):
         """Main driver for the entire AMDN algorithm.
         The first line contains steps 1-4.
         The second line contains step 5.
@@ -104,11 +284,16 @@ class AMDN:
                 Optional debugging mode.
             occ_threshold (int):
                 Threshold to be used for noise constraints.
+            workers (int):
+                The number of processes to build the constraints of the traces with.
 
         Returns:
             The extracted `Model`.
         """
-        wcnf, decode = AMDN._solve_constraints(obs_tracelist, occ_threshold, debug)
+        with _cached_vars():
+            wcnf, decode = AMDN._solve_constraints(
+                obs_tracelist, occ_threshold, debug, workers
+            )
         raw_model = extract_raw_model(wcnf, decode)
         return AMDN._extract_model(obs_tracelist, raw_model)
 
@@ -141,14 +326,17 @@ class AMDN:
             prob_disordered (float):
                 The probability that the two actions relevant fot this constraint are disordered.
         """
+        # auxiliary variables with a (near-)zero weight would not change the objective, so don't weigh them
+        weigh_aux = prob_disordered > EPS
         # find all the auxiliary variables
         for clause in cnf_formula.children:
-            for var in clause.children:
-                if isinstance(var.name, Aux) and var.true:
-                    # aux variables are the soft clauses that get the original weight
-                    constraints[AMDN._or_refactor(var)] = prob_disordered * WMAX
+            if weigh_aux:
+                for var in clause.children:
+                    if isinstance(var.name, Aux) and var.true:
+                        # aux variables are the soft clauses that get the original weight
+                        constraints[AMDN._or_refactor(var)] = prob_disordered * WMAX
             # set each original constraint to be a hard clause
-            constraints[clause] = "HARD"
+            constraints[clause] = _HARD
 
     @staticmethod
     def _get_observe(obs_tracelist: ObservedTraceList):
@@ -262,108 +450,265 @@ class AMDN:
             print()
 
     @staticmethod
-    def _build_disorder_constraints(obs_tracelist: ObservedTraceList):
+    def _instantiate_disorder_shape(
+        act_x: Action, act_y: Action, propositions: Tuple[Fluent, ...]
+    ):
+        """Substitutes a pair of actions and the propositions into `DISORDER_SHAPE`. The result is the
+        CNF formula of the disjunction of the disorder constraint over all propositions.
+
+        As in the Tseitin encoding of the whole disjunction, each proposition (if there are several)
+        gets an auxiliary variable of its own, which the top-level clause is made up of. It implies the
+        disjunction of the auxiliary variables of its conjunctions, and like them gets a weight in
+        `_extract_aux_set_weights`.
+
+        Args:
+            act_x (Action):
+                The action in the earlier parallel action set.
+            act_y (Action):
+                The action in the later parallel action set.
+            propositions (Tuple[Fluent, ...]):
+                The propositions to substitute into the shape.
+
+        Returns:
+            The CNF formula of the disorder constraint over all propositions.
+        """
+        acts = (act_x, act_y)
+        placeholders = {"_pre": pre, "_add": add, "_del": delete}
+        clauses = []
+        # the top-level clause is shared by all propositions
+        top_clause = []
+        for r in propositions:
+            # each proposition gets its own set of auxiliary variables
+            aux_map = {}
+            for clause in DISORDER_SHAPE.children:
+                lits = []
+                for var in clause.children:
+                    if isinstance(var.name, Aux):
+                        if var.name not in aux_map:
+                            aux_map[var.name] = Var.aux()
+                        lit = aux_map[var.name]
+                    else:
+                        kind, i = var.name
+                        lit = placeholders[kind](r, acts[i])
+                    lits.append(lit if var.true else ~lit)
+                if not all(isinstance(var.name, Aux) for var in clause.children):
+                    clauses.append(Or(lits))
+                elif len(propositions) > 1:
+                    # the disjunction of the conjunctions, under the proposition's own auxiliary variable
+                    aux_r = Var.aux()
+                    clauses.append(Or([~aux_r] + lits))
+                    top_clause.append(aux_r)
+                else:
+                    top_clause.extend(lits)
+        clauses.append(Or(top_clause))
+        return And(clauses)
+
+    @staticmethod
+    def _build_trace_disorder_constraints(
+        par_act_sets: List[Set[Action]],
+        propositions: Tuple[Fluent, ...],
+        action_ids: Dict[Action, int],
+        pair_probabilities: Dict[Tuple[int, int], float],
+    ):
+        """Builds the disorder constraints of a single trace.
+
+        Args:
+            par_act_sets (List[Set[Action]]):
+                The parallel action sets of the trace.
+            propositions (Tuple[Fluent, ...]):
+                The propositions to build the constraints for.
+            action_ids (Dict[Action, int]):
+                The index of each action.
+            pair_probabilities (Dict[Tuple[int, int], float]):
+                The probability of each pair of actions being disordered, keyed by their (smaller, larger) indices.
+
+        Returns:
+            The disorder constraints of the trace.
+        """
+        disorder_constraints = {}
+
+        # iterate through all pairs of parallel action sets for this trace
+        # use -1 since we will be referencing the current parallel action set and the following one
+        for j in range(len(par_act_sets) - 1):
+            # for each action in psi_i+1
+            for act_y in par_act_sets[j + 1]:
+                iy = action_ids[act_y]
+                # for each action in psi_i
+                # NOTE: we do not use an existential here, as the paper describes (for each act_y in psi_i + 1,
+                # there exists an act_x in psi_i such that the condition holds.)
+                # this is due to the fact that the weights must be set for each action pair.
+                for act_x in par_act_sets[j]:
+                    if act_x != act_y:
+                        # calculate the probability of the actions being disordered (p)
+                        ix = action_ids[act_x]
+                        p = pair_probabilities[(min(ix, iy), max(ix, iy))]
+                        # each constraint only needs to hold for one proposition to be true
+                        disjunct_all_constr_1 = AMDN._instantiate_disorder_shape(
+                            act_x, act_y, propositions
+                        )
+                        disjunct_all_constr_2 = AMDN._instantiate_disorder_shape(
+                            act_y, act_x, propositions
+                        )
+                        AMDN._extract_aux_set_weights(
+                            disjunct_all_constr_1, disorder_constraints, (1 - p)
+                        )
+                        AMDN._extract_aux_set_weights(
+                            disjunct_all_constr_2, disorder_constraints, p
+                        )
+        return disorder_constraints
+
+    @staticmethod
+    def _build_disorder_constraints(
+        obs_tracelist: ObservedTraceList,
+        propositions: Tuple[Fluent, ...],
+        workers: int,
+    ):
         """Builds disorder constraints. Corresponds to step 1 of the AMDN algorithm.
 
         Args:
             obs_tracelist (ObservationLists):
                 The tokens to be analyzed.
+            propositions (Tuple[Fluent, ...]):
+                The propositions to build the constraints for.
+            workers (int):
+                The number of processes to build the constraints of the traces with.
 
         Returns:
             The disorder constraints to be used in the algorithm.
         """
         disorder_constraints = {}
-
         # iterate through all traces
-        for i in range(len(obs_tracelist.all_par_act_sets)):
-            # get the parallel action sets for this trace
-            par_act_sets = obs_tracelist.all_par_act_sets[i]
-            # iterate through all pairs of parallel action sets for this trace
-            # use -1 since we will be referencing the current parallel action set and the following one
-            for j in range(len(par_act_sets) - 1):
-                # for each action in psi_i+1
-                for act_y in par_act_sets[j + 1]:
-                    # for each action in psi_i
-                    # NOTE: we do not use an existential here, as the paper describes (for each act_y in psi_i + 1,
-                    # there exists an act_x in psi_i such that the condition holds.)
-                    # this is due to the fact that the weights must be set for each action pair.
-                    for act_x in par_act_sets[j]:
-                        if act_x != act_y:
-                            # calculate the probability of the actions being disordered (p)
-                            p = obs_tracelist.probabilities[ActionPair({act_x, act_y})]
-                            # each constraint only needs to hold for one proposition to be true
-                            constraint_1 = []
-                            constraint_2 = []
-                            for r in obs_tracelist.propositions:
-                                constraint_1.append(
-                                    Or(
-                                        [
-                                            And(
-                                                [
-                                                    pre(r, act_x),
-                                                    ~delete(r, act_x),
-                                                    delete(r, act_y),
-                                                ]
-                                            ),
-                                            And([add(r, act_x), pre(r, act_y)]),
-                                            And([add(r, act_x), delete(r, act_y)]),
-                                            And([delete(r, act_x), add(r, act_y)]),
-                                        ]
-                                    )
-                                )
-                                constraint_2.append(
-                                    Or(
-                                        [
-                                            And(
-                                                [
-                                                    pre(r, act_y),
-                                                    ~delete(r, act_y),
-                                                    delete(r, act_x),
-                                                ]
-                                            ),
-                                            And([add(r, act_y), pre(r, act_x)]),
-                                            And([add(r, act_y), delete(r, act_x)]),
-                                            And([delete(r, act_y), add(r, act_x)]),
-                                        ]
-                                    )
-                                )
-                            disjunct_all_constr_1 = Or(constraint_1).to_CNF()
-                            disjunct_all_constr_2 = Or(constraint_2).to_CNF()
-                            AMDN._extract_aux_set_weights(
-                                disjunct_all_constr_1, disorder_constraints, (1 - p)
-                            )
-                            AMDN._extract_aux_set_weights(
-                                disjunct_all_constr_2, disorder_constraints, p
-                            )
+        for trace_constraints in _map_traces(
+            AMDN._build_trace_disorder_constraints,
+            obs_tracelist.all_par_act_sets,
+            workers,
+            propositions,
+            obs_tracelist.action_ids,
+            obs_tracelist.pair_probabilities,
+        ):
+            # every trace has its own auxiliary variables, so the constraints never overlap
+            disorder_constraints.update(trace_constraints)
         return disorder_constraints
 
     @staticmethod
-    def _build_hard_parallel_constraints(obs_tracelist: ObservedTraceList):
+    def _build_hard_parallel_constraints(
+        propositions: Tuple[Fluent, ...], actions: Tuple[Action, ...]
+    ):
         """Builds hard parallel constraints.
 
         Args:
-            obs_tracelist (ObservationLists):
-                The tokens to be analyzed.
+            propositions (Tuple[Fluent, ...]):
+                The propositions to build the constraints for.
+            actions (Tuple[Action, ...]):
+                The actions to build the constraints for.
 
         Returns:
             The hard parallel constraints to be used in the algorithm.
         """
         hard_constraints = {}
         # create a list of all <a, r> tuples
-        for act in obs_tracelist.actions:
-            for r in obs_tracelist.propositions:
+        for act in actions:
+            for r in propositions:
                 # for each action x proposition pair, enforce the two hard constraints with weight wmax
                 hard_constraints[implies(add(r, act), ~pre(r, act))] = WMAX
                 hard_constraints[implies(delete(r, act), pre(r, act))] = WMAX
         return hard_constraints
 
     @staticmethod
-    def _build_soft_parallel_constraints(obs_tracelist: ObservedTraceList):
+    def _add_soft_parallel_constraints(
+        soft_constraints: Dict,
+        act_x: Action,
+        act_x_prime: Action,
+        propositions: Tuple[Fluent, ...],
+        weight: float,
+    ):
+        """Adds the soft parallel constraints that the add effects of `act_x` are not deleted by `act_x_prime`.
+
+        Args:
+            soft_constraints (Dict):
+                The existing dictionary of soft parallel constraints.
+            act_x (Action):
+                The action whose add effects are constrained.
+            act_x_prime (Action):
+                The action whose delete effects are constrained.
+            propositions (Tuple[Fluent, ...]):
+                The propositions to build the constraints for.
+            weight (float):
+                The weight of the constraints.
+        """
+        # iterate through all propositions
+        for r in propositions:
+            constraint = implies(add(r, act_x), ~delete(r, act_x_prime))
+            # the same constraint can come up in several parallel action sets; accumulate its weight
+            soft_constraints[constraint] = (
+                soft_constraints.get(constraint, 0) + weight * WMAX
+            )
+
+    @staticmethod
+    def _build_trace_soft_parallel_constraints(
+        par_act_sets: List[Set[Action]],
+        propositions: Tuple[Fluent, ...],
+        action_ids: Dict[Action, int],
+        pair_probabilities: Dict[Tuple[int, int], float],
+    ):
+        """Builds the soft parallel constraints of a single trace.
+
+        Args:
+            par_act_sets (List[Set[Action]]):
+                The parallel action sets of the trace.
+            propositions (Tuple[Fluent, ...]):
+                The propositions to build the constraints for.
+            action_ids (Dict[Action, int]):
+                The index of each action.
+            pair_probabilities (Dict[Tuple[int, int], float]):
+                The probability of each pair of actions being disordered, keyed by their (smaller, larger) indices.
+
+        Returns:
+            The soft parallel constraints of the trace.
+        """
+        soft_constraints = {}
+
+        # iterate through all parallel action sets for this trace
+        for j in range(len(par_act_sets)):
+            # within each parallel action set, iterate through the same action set again to compare
+            # each action to every other action in the set; setting constraints assuming actions are not disordered
+            for act_x in par_act_sets[j]:
+                ix = action_ids[act_x]
+                for act_x_prime in par_act_sets[j] - {act_x}:
+                    ixp = action_ids[act_x_prime]
+                    p = pair_probabilities[(min(ix, ixp), max(ix, ixp))]
+                    AMDN._add_soft_parallel_constraints(
+                        soft_constraints, act_x, act_x_prime, propositions, 1 - p
+                    )
+            # then, compare every action in the next parallel action set to every action in this one;
+            # setting constraints assuming actions are disordered
+            if j + 1 < len(par_act_sets):
+                for act_y in par_act_sets[j + 1]:
+                    iy = action_ids[act_y]
+                    for act_x_prime in par_act_sets[j] - {act_y}:
+                        ixp = action_ids[act_x_prime]
+                        p = pair_probabilities[(min(iy, ixp), max(iy, ixp))]
+                        AMDN._add_soft_parallel_constraints(
+                            soft_constraints, act_y, act_x_prime, propositions, p
+                        )
+
+        return soft_constraints
+
+    @staticmethod
+    def _build_soft_parallel_constraints(
+        obs_tracelist: ObservedTraceList,
+        propositions: Tuple[Fluent, ...],
+        workers: int,
+    ):
         """Builds soft parallel constraints.
 
         Args:
             obs_tracelist (ObservationLists):
                 The tokens to be analyzed.
+            propositions (Tuple[Fluent, ...]):
+                The propositions to build the constraints for.
+            workers (int):
+                The number of processes to build the constraints of the traces with.
 
         Returns:
             The soft parallel constraints to be used in the algorithm.
@@ -375,61 +720,54 @@ class AMDN:
         # in the parallel action set).
 
         # iterate through all traces
-        for i in range(len(obs_tracelist.all_par_act_sets)):
-            par_act_sets = obs_tracelist.all_par_act_sets[i]
-            # iterate through all parallel action sets for this trace
-            for j in range(len(par_act_sets)):
-                # within each parallel action set, iterate through the same action set again to compare
-                # each action to every other action in the set; setting constraints assuming actions are not disordered
-                for act_x in par_act_sets[j]:
-                    for act_x_prime in par_act_sets[j] - {act_x}:
-                        p = obs_tracelist.probabilities[
-                            ActionPair({act_x, act_x_prime})
-                        ]
-                        # iterate through all propositions
-                        for r in obs_tracelist.propositions:
-                            soft_constraints[
-                                implies(add(r, act_x), ~delete(r, act_x_prime))
-                            ] = (1 - p) * WMAX
-
-        # iterate through all traces
-        for i in range(len(obs_tracelist.all_par_act_sets)):
-            par_act_sets = obs_tracelist.all_par_act_sets[i]
-            # then, iterate through all pairs of parallel action sets for each trace
-            for j in range(len(par_act_sets) - 1):
-                # for each pair, compare every action in act_y to every action in act_x_prime; setting constraints assuming actions are disordered
-                for act_y in par_act_sets[j + 1]:
-                    for act_x_prime in par_act_sets[j] - {act_y}:
-                        p = obs_tracelist.probabilities[
-                            ActionPair({act_y, act_x_prime})
-                        ]
-                        # iterate through all propositions and similarly set the constraint
-                        for r in obs_tracelist.propositions:
-                            soft_constraints[
-                                implies(add(r, act_y), ~delete(r, act_x_prime))
-                            ] = (p * WMAX)
+        for trace_constraints in _map_traces(
+            AMDN._build_trace_soft_parallel_constraints,
+            obs_tracelist.all_par_act_sets,
+            workers,
+            propositions,
+            obs_tracelist.action_ids,
+            obs_tracelist.pair_probabilities,
+        ):
+            # accumulate the weights of constraints that come up in several traces
+            for constraint, weight in trace_constraints.items():
+                soft_constraints[constraint] = (
+                    soft_constraints.get(constraint, 0) + weight
+                )
 
         return soft_constraints
 
     @staticmethod
     def _build_parallel_constraints(
-        obs_tracelist: ObservedTraceList, debug: bool, to_obs: Optional[List[str]]
+        obs_tracelist: ObservedTraceList,
+        propositions: Tuple[Fluent, ...],
+        actions: Tuple[Action, ...],
+        debug: bool,
+        to_obs: Optional[List[str]],
+        workers: int,
     ):
         """Main driver for building parallel constraints. Corresponds to step 2 of the AMDN algorithm.
 
         Args:
             obs_tracelist (ObservationLists):
                 The tokens that were analyzed.
+            propositions (Tuple[Fluent, ...]):
+                The propositions to build the constraints for.
+            actions (Tuple[Action, ...]):
+                The actions to build the constraints for.
             debug (bool):
                 Optional debugging mode.
             to_obs (Optional[List[str]]):
                 If in the optional debugging mode, the list of fluents to observe.
+            workers (int):
+                The number of processes to build the constraints of the traces with.
 
         Returns:
             The parallel constraints.
         """
-        hard_constraints = AMDN._build_hard_parallel_constraints(obs_tracelist)
-        soft_constraints = AMDN._build_soft_parallel_constraints(obs_tracelist)
+        hard_constraints = AMDN._build_hard_parallel_constraints(propositions, actions)
+        soft_constraints = AMDN._build_soft_parallel_constraints(
+            obs_tracelist, propositions, workers
+        )
         if debug:
             print("\nHard parallel constraints:")
             AMDN._debug_simple_pprint(hard_constraints, to_obs)
@@ -438,53 +776,72 @@ class AMDN:
         return {**hard_constraints, **soft_constraints}
 
     @staticmethod
-    def _calculate_all_r_occ(obs_tracelist: ObservedTraceList):
-        """Calculates the total number of (true) propositions in the provided traces/tokens.
+    def _get_state_matrix(states: List[State], prop_index: Dict[Fluent, int]):
+        """Packs the given states into a boolean matrix with a row for each state and a column for each
+        proposition. An entry is True if the proposition is true in the state.
 
         Args:
-            obs_tracelist (ObservationLists):
-                The tokens to be analyzed.
+            states (List[State]):
+                The states to pack.
+            prop_index (Dict[Fluent, int]):
+                A mapping of each proposition to its column in the matrix.
 
         Returns:
-            The total number of (true) propositions in the provided traces/tokens.
+            The boolean state matrix.
         """
-        # tracks occurrences of all propositions
-        all_occ = 0
-        for trace in obs_tracelist:
-            for step in trace:
-                all_occ += len([f for f in step.state if step.state[f]])
-        return all_occ
+        state_matrix = np.zeros((len(states), len(prop_index)), dtype=bool)
+        for i, state in enumerate(states):
+            state_matrix[i, [prop_index[f] for f in state.true_fluents]] = True
+        return state_matrix
 
     @staticmethod
-    def _set_up_occurrences_dict(obs_tracelist: ObservedTraceList):
-        """Helper function used when constructing noise constraints.
-        Sets up an "occurrence" dictionary used to track the occurrences of propositions
-        before or after actions.
+    def _get_state_masks(state_matrix: np.ndarray):
+        """Converts each row of a state matrix to a bitmask, where bit `i` is set if the proposition
+        in column `i` is true in that state.
 
         Args:
-            obs_tracelist (ObservationLists):
-                The tokens to be analyzed.
+            state_matrix (np.ndarray):
+                The boolean state matrix to convert.
 
         Returns:
-            The blank "occurrences" dictionary.
+            The list of bitmasks, one for each state.
         """
-        # set up dict
-        occurrences = {}
-        for a in obs_tracelist.actions:
-            occurrences[a] = {}
-            for r in obs_tracelist.propositions:
-                occurrences[a][r] = 0
-        return occurrences
+        packed = np.packbits(state_matrix, axis=1, bitorder="little")
+        return [int.from_bytes(row.tobytes(), "little") for row in packed]
+
+    @staticmethod
+    def _calculate_all_r_occ(state_matrices: List[np.ndarray]):
+        """Calculates the total number of (true) propositions in the provided traces/tokens.
+
+        Args:
+            state_matrices (List[np.ndarray]):
+                The state matrices of the tokens in each trace.
+
+        Returns:
+            The total number of (true) propositions in the provided traces/tokens.
+        """
+        return sum(int(state_matrix.sum()) for state_matrix in state_matrices)
 
     @staticmethod
     def _noise_constraints_6(
-        obs_tracelist: ObservedTraceList, all_occ: int, occ_threshold: int
+        obs_tracelist: ObservedTraceList,
+        state_matrices: List[np.ndarray],
+        propositions: Tuple[Fluent, ...],
+        actions: Tuple[Action, ...],
+        all_occ: int,
+        occ_threshold: int,
     ):
         """Noise constraints (6) in the AMDN paper.
 
         Args:
             obs_tracelist (ObservationLists):
                 The tokens that were analyzed.
+            state_matrices (List[np.ndarray]):
+                The state matrices of the tokens in each trace.
+            propositions (Tuple[Fluent, ...]):
+                The propositions, in the order of the state matrix columns.
+            actions (Tuple[Action, ...]):
+                The actions to build the constraints for.
             all_occ (int):
                 The number of occurrences of all (true) propositions in the given observation list.
             occ_threshold (int):
@@ -494,41 +851,42 @@ class AMDN:
             The noise constraints.
         """
         noise_constraints_6 = {}
-        occurrences = AMDN._set_up_occurrences_dict(obs_tracelist)
+        action_index = {a: i for i, a in enumerate(actions)}
+        occurrences = np.zeros((len(actions), len(propositions)), dtype=int)
 
         # iterate over ALL the plan traces, adding occurrences accordingly
-        for i in range(len(obs_tracelist)):
-            # iterate through each step in each trace, omitting the last step because the last action is None/we access the state in the next step
-            for j in range(len(obs_tracelist[i]) - 1):
-                true_prop = [
-                    f
-                    for f in obs_tracelist[i][j + 1].state
-                    if obs_tracelist[i][j + 1].state[f]
-                ]
-                for r in true_prop:
-                    # count the number of occurrences of each action and its following proposition
-                    occurrences[obs_tracelist[i][j].action][r] += 1
-
-        # iterate through actions
-        for a in occurrences:
-            # iterate through all propositions for this action
-            for r in occurrences[a]:
-                occ_r = occurrences[a][r]
-                # if the # of occurrences is higher than the user-provided threshold:
-                if occ_r > occ_threshold:
-                    # set constraint 6 with the calculated weight
-                    noise_constraints_6[AMDN._or_refactor(~delete(r, a))] = (
-                        occ_r / all_occ
-                    ) * WMAX
+        for trace, state_matrix in zip(obs_tracelist, state_matrices):
+            # omit the last step because the last action is None/we access the state in the next step
+            action_ids = np.array(
+                [action_index[token.action] for token in trace[:-1]], dtype=int
+            )
+            # count the number of occurrences of each action and its following proposition
+            _occurrence_counter()(occurrences, action_ids, state_matrix[1:])
+
+        # iterate through the (action, proposition) pairs with a # of occurrences higher than the user-provided threshold
+        for a, r in np.argwhere(occurrences > occ_threshold):
+            # set constraint 6 with the calculated weight
+            noise_constraints_6[
+                AMDN._or_refactor(~delete(propositions[r], actions[a]))
+            ] = (int(occurrences[a, r]) / all_occ) * WMAX
         return noise_constraints_6
 
     @staticmethod
-    def _noise_constraints_7(obs_tracelist: ObservedTraceList, all_occ: int):
+    def _noise_constraints_7(
+        obs_tracelist: ObservedTraceList,
+        par_state_matrices: List[np.ndarray],
+        propositions: Tuple[Fluent, ...],
+        all_occ: int,
+    ):
         """Noise constraints (7) in the AMDN paper.
 
         Args:
             obs_tracelist (ObservationLists):
                 The tokens that were analyzed.
+            par_state_matrices (List[np.ndarray]):
+                The state matrices of the states between the parallel action sets of each trace.
+            propositions (Tuple[Fluent, ...]):
+                The propositions, in the order of the state matrix columns.
             all_occ (int):
                 The number of occurrences of all (true) propositions in the given observation list.
 
@@ -536,40 +894,50 @@ class AMDN:
             The noise constraints.
         """
         noise_constraints_7 = {}
-        # set up dict
-        occurrences = {}
-        for r in obs_tracelist.propositions:
-            occurrences[r] = 0
-
-        for trace in obs_tracelist.all_states:
-            for state in trace:
-                true_prop = [r for r in state if state[r]]
-                for r in true_prop:
-                    occurrences[r] += 1
+        # count the occurrences of each proposition
+        occurrences = np.zeros(len(propositions), dtype=int)
+        for state_matrix in par_state_matrices:
+            occurrences += state_matrix.sum(axis=0)
 
         # iterate through all traces
-        for i in range(len(obs_tracelist.all_par_act_sets)):
-            # get the next trace/states
-            par_act_sets = obs_tracelist.all_par_act_sets[i]
-            states = obs_tracelist.all_states[i]
+        for par_act_sets, state_matrix in zip(
+            obs_tracelist.all_par_act_sets, par_state_matrices
+        ):
+            masks = AMDN._get_state_masks(state_matrix)
             # iterate through all parallel action sets within the trace
             for j in range(len(par_act_sets)):
-                # examine the states before and after each parallel action set; set constraints accordinglly
-                true_prop = [r for r in states[j + 1] if states[j + 1][r]]
-                for r in true_prop:
-                    if not states[j][r]:
-                        noise_constraints_7[
-                            Or([add(r, act) for act in par_act_sets[j]])
-                        ] = (occurrences[r] / all_occ) * WMAX
+                # examine the states before and after each parallel action set; set constraints accordingly
+                # for each proposition that became true (i.e. each bit set in the new mask but not the old one)
+                newly_true = masks[j + 1] & ~masks[j]
+                while newly_true:
+                    low_bit = newly_true & -newly_true
+                    r = low_bit.bit_length() - 1
+                    newly_true ^= low_bit
+                    noise_constraints_7[
+                        Or([add(propositions[r], act) for act in par_act_sets[j]])
+                    ] = (int(occurrences[r]) / all_occ) * WMAX
         return noise_constraints_7
 
     @staticmethod
-    def _noise_constraints_8(obs_tracelist, all_occ: int, occ_threshold: int):
+    def _noise_constraints_8(
+        obs_tracelist: ObservedTraceList,
+        state_matrices: List[np.ndarray],
+        propositions: Tuple[Fluent, ...],
+        actions: Tuple[Action, ...],
+        all_occ: int,
+        occ_threshold: int,
+    ):
         """Noise constraints (8) in the AMDN paper.
 
         Args:
             obs_tracelist (ObservationLists):
                 The tokens that were analyzed.
+            state_matrices (List[np.ndarray]):
+                The state matrices of the tokens in each trace.
+            propositions (Tuple[Fluent, ...]):
+                The propositions, in the order of the state matrix columns.
+            actions (Tuple[Action, ...]):
+                The actions to build the constraints for.
             all_occ (int):
                 The number of occurrences of all (true) propositions in the given observation list.
             occ_threshold (int):
@@ -579,39 +947,33 @@ class AMDN:
             The noise constraints.
         """
         noise_constraints_8 = {}
-        occurrences = AMDN._set_up_occurrences_dict(obs_tracelist)
+        action_index = {a: i for i, a in enumerate(actions)}
+        occurrences = np.zeros((len(actions), len(propositions)), dtype=int)
 
         # iterate over ALL the plan traces, adding occurrences accordingly
-        for i in range(len(obs_tracelist)):
-            # iterate through each step in each trace
-            for j in range(len(obs_tracelist[i])):
-                # if the action is not None
-                if obs_tracelist[i][j].action:
-                    true_prop = [
-                        f
-                        for f in obs_tracelist[i][j].state
-                        if obs_tracelist[i][j].state[f]
-                    ]
-                    for r in true_prop:
-                        # count the number of occurrences of each action and its previous proposition
-                        occurrences[obs_tracelist[i][j].action][r] += 1
-
-        # iterate through actions
-        for a in occurrences:
-            # iterate through all propositions for this action
-            for r in occurrences[a]:
-                occ_r = occurrences[a][r]
-                # if the # of occurrences is higher than the user-provided threshold:
-                if occ_r > occ_threshold:
-                    # set constraint 8 with the calculated weight
-                    noise_constraints_8[AMDN._or_refactor(pre(r, a))] = (
-                        occ_r / all_occ
-                    ) * WMAX
+        for trace, state_matrix in zip(obs_tracelist, state_matrices):
+            # only consider the steps where the action is not None
+            has_action = np.array([bool(token.action) for token in trace], dtype=bool)
+            action_ids = np.array(
+                [action_index[token.action] for token in trace if token.action],
+                dtype=int,
+            )
+            # count the number of occurrences of each action and its previous proposition
+            _occurrence_counter()(occurrences, action_ids, state_matrix[has_action])
+
+        # iterate through the (action, proposition) pairs with a # of occurrences higher than the user-provided threshold
+        for a, r in np.argwhere(occurrences > occ_threshold):
+            # set constraint 8 with the calculated weight
+            noise_constraints_8[AMDN._or_refactor(pre(propositions[r], actions[a]))] = (
+                int(occurrences[a, r]) / all_occ
+            ) * WMAX
         return noise_constraints_8
 
     @staticmethod
     def _build_noise_constraints(
         obs_tracelist: ObservedTraceList,
+        propositions: Tuple[Fluent, ...],
+        actions: Tuple[Action, ...],
         occ_threshold: int,
         debug: bool,
         to_obs: Optional[List[str]],
@@ -621,6 +983,10 @@ class AMDN:
         Args:
             obs_tracelist (ObservationLists):
                 The tokens that were analyzed.
+            propositions (Tuple[Fluent, ...]):
+                The propositions to build the constraints for.
+            actions (Tuple[Action, ...]):
+                The actions to build the constraints for.
             occ_threshold (int):
                 Threshold to be used for noise constraints.
             debug (bool):
@@ -628,11 +994,27 @@ class AMDN:
             to_obs (Optional[List[str]]):
                 If in the optional debugging mode, the list of fluents to observe.
         """
+        prop_index = {r: i for i, r in enumerate(propositions)}
+        # pack the states of the tokens and the states between the parallel action sets once
+        state_matrices = [
+            AMDN._get_state_matrix([token.state for token in trace], prop_index)
+            for trace in obs_tracelist
+        ]
+        par_state_matrices = [
+            AMDN._get_state_matrix(states, prop_index)
+            for states in obs_tracelist.all_states
+        ]
         # calculate all occurrences for use in weights
-        all_occ = AMDN._calculate_all_r_occ(obs_tracelist)
-        nc_6 = AMDN._noise_constraints_6(obs_tracelist, all_occ, occ_threshold)
-        nc_7 = AMDN._noise_constraints_7(obs_tracelist, all_occ)
-        nc_8 = AMDN._noise_constraints_8(obs_tracelist, all_occ, occ_threshold)
+        all_occ = AMDN._calculate_all_r_occ(state_matrices)
+        nc_6 = AMDN._noise_constraints_6(
+            obs_tracelist, state_matrices, propositions, actions, all_occ, occ_threshold
+        )
+        nc_7 = AMDN._noise_constraints_7(
+            obs_tracelist, par_state_matrices, propositions, all_occ
+        )
+        nc_8 = AMDN._noise_constraints_8(
+            obs_tracelist, state_matrices, propositions, actions, all_occ, occ_threshold
+        )
         if debug:
             print("\nNoise constraints 6:")
             AMDN._debug_simple_pprint(nc_6, to_obs)
@@ -644,7 +1026,10 @@ class AMDN:
 
     @staticmethod
     def _set_all_constraints(
-        obs_tracelist: ObservedTraceList, occ_threshold: int, debug: bool
+        obs_tracelist: ObservedTraceList,
+        occ_threshold: int,
+        debug: bool,
+        workers: int,
     ):
         """Main driver for generating all constraints in the AMDN algorithm.
 
@@ -655,6 +1040,8 @@ class AMDN:
                 Threshold to be used for noise constraints.
             debug (bool):
                 Optional debugging mode.
+            workers (int):
+                The number of processes to build the constraints of the traces with.
 
         Returns:
             A dictionary that constains all of the constraints set and all of their weights.
@@ -662,21 +1049,29 @@ class AMDN:
         to_obs = None
         if debug:
             to_obs = AMDN._get_observe(obs_tracelist)
-        disorder_constraints = AMDN._build_disorder_constraints(obs_tracelist)
+        # fix the order of the propositions and actions once, and share it between all the builders
+        propositions = tuple(obs_tracelist.propositions)
+        actions = tuple(obs_tracelist.actions)
+        disorder_constraints = AMDN._build_disorder_constraints(
+            obs_tracelist, propositions, workers
+        )
         if debug:
             print("\nDisorder constraints:")
             AMDN._debug_aux_pprint(disorder_constraints, to_obs)
         parallel_constraints = AMDN._build_parallel_constraints(
-            obs_tracelist, debug, to_obs
+            obs_tracelist, propositions, actions, debug, to_obs, workers
         )
         noise_constraints = AMDN._build_noise_constraints(
-            obs_tracelist, occ_threshold, debug, to_obs
+            obs_tracelist, propositions, actions, occ_threshold, debug, to_obs
         )
         return {**disorder_constraints, **parallel_constraints, **noise_constraints}
 
     @staticmethod
     def _solve_constraints(
-        obs_tracelist: ObservedTraceList, occ_threshold: int, debug: bool
+        obs_tracelist: ObservedTraceList,
+        occ_threshold: int,
+        debug: bool,
+        workers: int,
     ):
         """Returns the WCNF and the decoder according to the constraints generated.
         Corresponds to step 4 of the AMDN algorithm.
@@ -688,23 +1083,28 @@ class AMDN:
                 Threshold to be used for noise constraints.
             debug (bool):
                 Optional debugging mode.
+            workers (int):
+                The number of processes to build the constraints of the traces with.
 
         Returns:
             The WCNF and corresponding decode dictionary.
         """
-        constraints = AMDN._set_all_constraints(obs_tracelist, occ_threshold, debug)
-        # extract hard constraints
+        constraints = AMDN._set_all_constraints(
+            obs_tracelist, occ_threshold, debug, workers
+        )
+        # partition the constraints into hard and soft ones
         hard_constraints = []
+        soft_constraints = {}
         for c, weight in constraints.items():
-            if weight == "HARD":
+            if weight is _HARD:
                 hard_constraints.append(c)
-        for c in hard_constraints:
-            del constraints[c]
+            else:
+                soft_constraints[c] = weight
 
         wcnf, decode = to_wcnf(
-            soft_clauses=And(constraints.keys()),
+            soft_clauses=And(soft_constraints.keys()),
             hard_clauses=And(hard_constraints),
-            weights=list(constraints.values()),
+            weights=list(soft_constraints.values()),
         )
         return wcnf, decode
 
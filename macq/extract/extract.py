@@ -2,6 +2,8 @@
 
 from dataclasses import dataclass
 from enum import Enum, auto
+from types import MappingProxyType
+from typing import Mapping
 
 from ..observation import ObservedTraceList
 from ..trace import Action, State
@@ -33,6 +35,18 @@ class modes(Enum):
     LOCM = auto()
 
 
+# the extraction technique used for each mode
+_TECHNIQUES: Mapping[modes, type] = MappingProxyType(
+    {
+        modes.OBSERVER: Observer,
+        modes.SLAF: SLAF,
+        modes.AMDN: AMDN,
+        modes.ARMS: ARMS,
+        modes.LOCM: LOCM,
+    }
+)
+
+
 class Extract:
     """Extracts models from observations.
 
@@ -68,11 +82,4 @@ class Extract:
         if len(obs_tracelist) == 0:
             raise ValueError("ObservationList is empty. Nothing to extract from.")
 
-        techniques = {
-            modes.OBSERVER: Observer,
-            modes.SLAF: SLAF,
-            modes.AMDN: AMDN,
-            modes.ARMS: ARMS,
-            modes.LOCM: LOCM,
-        }
-        return techniques[mode](obs_tracelist, debug=debug, **kwargs)
+        return _TECHNIQUES[mode](obs_tracelist, debug=debug, **kwargs)
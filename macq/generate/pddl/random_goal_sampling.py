@@ -152,11 +152,8 @@ class RandomGoalSampling(VanillaSampling):
                     continue
 
                 # create a State and add it to the dictionary
-                state_dict = {}
-                for f in goal_f:
-                    state_dict[f] = True
                 # map each goal to the initial state and plan used to achieve it
-                goal_states[State(state_dict)] = {
+                goal_states[State(goal_f)] = {
                     "plan": test_plan,
                     "initial state": self.problem.init,
                 }
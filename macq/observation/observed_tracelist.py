@@ -112,26 +112,24 @@ class ObservedTraceList(MutableSequence):
             raise TokenTypeMismatch(self.type, type(value[0]))
 
     def get_actions(self) -> Set[Action]:
-        actions: Set[Action] = set()
-        for obs_trace in self:
-            for obs in obs_trace:
-                action = obs.action
-                if action is not None:
-                    actions.add(action)
-        return actions
+        return {
+            obs.action
+            for obs_trace in self
+            for obs in obs_trace
+            if obs.action is not None
+        }
 
     def get_fluents(self) -> Set[Fluent]:
-        fluents: Set[Fluent] = set()
-        for obs_trace in self:
-            for obs in obs_trace:
-                if obs.state:
-                    fluents.update(list(obs.state.keys()))
-        return fluents
+        return {
+            f for obs_trace in self for obs in obs_trace if obs.state for f in obs.state
+        }
 
     def tokenize(self, trace_list: TraceList, **kwargs):
-        for trace in trace_list:
-            tokens = trace.tokenize(self.type, **kwargs)
-            self.append(tokens)
+        # the tokens are all of self.type, so they are added in a single extend rather
+        # than type-checked one trace at a time through insert
+        self.observations.extend(
+            [trace.tokenize(self.type, **kwargs) for trace in trace_list]
+        )
 
     def fetch_observations(self, query: dict) -> List[Set[Observation]]:
         matches: List[Set[Observation]] = []
@@ -290,11 +288,7 @@ class ObservedTraceList(MutableSequence):
 
     @staticmethod
     def get_obs_fluents(obs_trace: List[Observation]):
-        fluents = set()
-        for obs in obs_trace:
-            if obs.state:
-                fluents.update(list(obs.state.keys()))
-        return fluents
+        return {f for obs in obs_trace if obs.state for f in obs.state}
 
     @staticmethod
     def get_obs_static_fluents(obs_trace: List[Observation]):
@@ -304,9 +298,4 @@ class ObservedTraceList(MutableSequence):
                 for f, v in obs.state.items():
                     fstates[f].append(v)
 
-        static = set()
-        for f, states in fstates.items():
-            if all(states) or not any(states):
-                static.add(f)
-
-        return static
+        return {f for f, states in fstates.items() if all(states) or not any(states)}
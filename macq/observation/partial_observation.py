@@ -81,7 +81,7 @@ class PartialObservation(Observation):
             A Step whose state is a PartialState with the specified fluents hidden.
         """
         new_fluents = {}
-        for f in step.state.fluents:
+        for f in step.state:
             new_fluents[f] = None if f in hide else step.state[f]
         return Step(PartialState(new_fluents), step.action, step.index)
 
@@ -70,7 +70,7 @@ class Action:
 
     def __hash__(self):
         # Order of obj_params is important!
-        return hash(self.details())
+        return hash((self.name, tuple(self.obj_params)))
 
     def details(self):
         string = f"{self.name} {' '.join([o.details() for o in self.obj_params])}"
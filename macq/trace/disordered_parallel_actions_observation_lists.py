@@ -127,6 +127,11 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
         probabilities (Dict[ActionPair, float]):
             A dictionary that contains a mapping of each possible `ActionPair` and the probability that the actions
             in them are disordered.
+        action_ids (Dict[Action, int]):
+            A mapping of each action to its index in `actions`.
+        pair_probabilities (Dict[Tuple[int, int], float]):
+            The same probabilities as `probabilities`, keyed by the (smaller, larger) indices of the actions
+            so they can be looked up without building an `ActionPair`.
     """
 
     def __init__(
@@ -162,7 +167,7 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
         self.actions = list(actions)
         # set of all fluents
         self.propositions = {
-            f for trace in traces for step in trace for f in step.state.fluents
+            f for trace in traces for step in trace for f in step.state
         }
         # create |A| (action x action set, no duplicates)
         self.cross_actions = [
@@ -173,6 +178,8 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
         self.denominator = self._calculate_denom()
         # dictionary that holds the probabilities of all actions being disordered
         self.probabilities = self._calculate_all_probabilities()
+        self.action_ids = {a: i for i, a in enumerate(self.actions)}
+        self.pair_probabilities = self._get_pair_probabilities()
         self.tokenize(traces, Token, **kwargs)
 
     @staticmethod
@@ -247,6 +254,19 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
             probabilities[combo] = self._calculate_probability(*combo.tup())
         return probabilities
 
+    def _get_pair_probabilities(self):
+        """Rekeys the probabilities of all combinations of actions being disordered by the indices of the actions.
+
+        Returns:
+            A dictionary that contains a mapping of the (smaller, larger) indices of each possible pair of actions
+            and the probability that the actions are disordered.
+        """
+        pair_probabilities = {}
+        for combo, p in self.probabilities.items():
+            i, j = (self.action_ids[a] for a in combo.tup())
+            pair_probabilities[(min(i, j), max(i, j))] = p
+        return pair_probabilities
+
     def _get_new_partial_state(self):
         """
         Return a PartialState with the fluents used in this observation, with each fluent set to None as default.
@@ -262,7 +282,7 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
         """
         Update the provided PartialState with the fluents provided.
         """
-        new_partial = partial_state.copy()
+        new_partial = PartialState(partial_state.fluents)
         effects = set([e for e in action.add] + [e for e in action.delete])
         for e in effects:
             new_partial[e] = orig_state[e]
@@ -331,8 +351,9 @@ class DisorderedParallelActionsObservationLists(ObservedTraceList):
                         for act_y in par_act_sets[j]:
                             if act_x != act_y:
                                 # get probability and divide by distance
-                                prob = self.probabilities[
-                                    ActionPair({act_x, act_y})
+                                ix, iy = self.action_ids[act_x], self.action_ids[act_y]
+                                prob = self.pair_probabilities[
+                                    (min(ix, iy), max(ix, iy))
                                 ] / (j - i)
                                 if _decision(prob):
                                     par_act_sets[i].discard(act_x)
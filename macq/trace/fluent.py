@@ -67,7 +67,7 @@ class Fluent:
 
     def __hash__(self):
         # Order of objects is important!
-        return hash(str(self))
+        return hash((self.name, tuple(self.objects)))
 
     def __repr__(self):
         return (
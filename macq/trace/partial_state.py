@@ -6,11 +6,11 @@ from typing import Dict, Union
 class PartialState(State):
     """A Partial State where the value of some fluents are unknown."""
 
-    def __init__(self, fluents: Dict[Fluent, Union[bool, None]] = {}):
+    def __init__(self, fluents: Dict[Fluent, Union[bool, None]] = None):
         """
         Args:
             fluents (dict):
                 Optional; A mapping of `Fluent` objects to their value in this
                 state. Defaults to an empty `dict`.
         """
-        self.fluents = fluents
+        self.fluents = fluents if fluents is not None else {}
@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, Mapping, Union
 from rich.text import Text
 from . import Fluent
 
@@ -12,66 +13,126 @@ class State:
 
     Attributes:
         fluents (dict):
-            A mapping of `Fluent` objects to their value in this state.
+            A mapping of `Fluent` objects to their value in this state. Read-only;
+            the state is modified through item assignment or deletion, `update`
+            and `clear`, which keep its caches up to date.
     """
 
-    def __init__(self, fluents: Dict[Fluent, bool] = None):
+    # cache for `true_fluents`, reset whenever the state is modified
+    _true_fluents = None
+    # cache for `__str__`, reset along with `_true_fluents`; `fluents` is read-only
+    _str = None
+    # cache of the fluents by name for `holds`, reset whenever fluents are added or removed
+    _name_index = None
+
+    def __init__(self, fluents: Union[Dict[Fluent, bool], Iterable[Fluent]] = None):
         """Initializes State with an optional fluent-value mapping.
 
         Args:
-            fluents (dict):
+            fluents (dict | iterable):
                 Optional; A mapping of `Fluent` objects to their value in this
-                state. Defaults to an empty `dict`.
+                state, or an iterable of the `Fluent` objects that are true in
+                this state. Defaults to an empty `dict`.
         """
-        self.fluents = fluents if fluents is not None else {}
+        if fluents is None:
+            self._fluents = {}
+        elif isinstance(fluents, dict):
+            self._fluents = fluents.copy()
+        else:
+            self._fluents = dict.fromkeys(fluents, True)
+            self._true_fluents = frozenset(self._fluents)
+
+    @property
+    def fluents(self) -> Mapping:
+        """A read-only view of the mapping of fluents to their value in this state."""
+        return MappingProxyType(self._fluents)
+
+    @fluents.setter
+    def fluents(self, fluents: Dict):
+        # copied, so the caches cannot be bypassed through the caller's dict
+        self._fluents = dict(fluents)
+        self._true_fluents = None
+        self._str = None
+        self._name_index = None
 
     def __eq__(self, other):
-        return isinstance(other, State) and self.fluents == other.fluents
+        return isinstance(other, State) and self._fluents == other._fluents
 
     def __str__(self):
-        return ", ".join([str(fluent) for (fluent, value) in self.items() if value])
+        if self._str is None:
+            self._str = ", ".join(
+                [str(fluent) for (fluent, value) in self.items() if value]
+            )
+        return self._str
 
     def __hash__(self):
         return hash(str(self.details()))
 
     def __len__(self):
-        return len(self.fluents)
+        return len(self._fluents)
 
     def __setitem__(self, key: Fluent, value: bool):
-        self.fluents[key] = value
+        if key not in self._fluents:
+            self._name_index = None
+        self._fluents[key] = value
+        self._true_fluents = None
+        self._str = None
 
     def __getitem__(self, key: Fluent):
-        return self.fluents[key]
+        return self._fluents[key]
 
     def __delitem__(self, key: Fluent):
-        del self.fluents[key]
+        del self._fluents[key]
+        self._true_fluents = None
+        self._str = None
+        self._name_index = None
 
     def __iter__(self):
-        return iter(self.fluents)
+        return iter(self._fluents)
 
     def __contains__(self, key):
-        return self.fluents[key]
+        # a fluent is "in" a state if it is true in it; absent fluents are not
+        return bool(self._fluents.get(key))
 
     def clear(self):
-        return self.fluents.clear()
+        self._true_fluents = None
+        self._str = None
+        self._name_index = None
+        return self._fluents.clear()
 
     def copy(self):
-        return self.fluents.copy()
+        return self._fluents.copy()
 
     def has_key(self, k):
-        return k in self.fluents
+        return k in self._fluents
 
     def update(self, *args, **kwargs):
-        return self.fluents.update(*args, **kwargs)
+        self._true_fluents = None
+        self._str = None
+        self._name_index = None
+        return self._fluents.update(*args, **kwargs)
 
     def keys(self):
-        return self.fluents.keys()
+        return self._fluents.keys()
 
     def values(self):
-        return self.fluents.values()
+        return self._fluents.values()
 
     def items(self):
-        return self.fluents.items()
+        return self._fluents.items()
+
+    @property
+    def true_fluents(self) -> FrozenSet[Fluent]:
+        """The set of fluents that are true in this state.
+
+        Computed on first access and cached until the state is modified through
+        item assignment or deletion, `update`, or `clear`.
+        """
+        if self._true_fluents is None:
+            self._true_fluents = frozenset(
+                fluent for fluent, value in self._fluents.items() if value
+            )
+        return self._true_fluents
 
     def details(self):
         string = Text()
@@ -84,16 +145,19 @@ class State:
     def clone(self, atomic=False):
         if atomic:
             return AtomicState({str(fluent): value for fluent, value in self.items()})
-        return State(self.fluents.copy())
+        return State(self._fluents)
 
     def holds(self, fluent: str):
-        fluents = dict(map(lambda f: (f.name, f), self.keys()))
-        if fluent in fluents.keys():
-            return self[fluents[fluent]]
+        # the name index is built on the first query and kept until fluents are added or removed
+        if self._name_index is None:
+            self._name_index = {f.name: f for f in self.keys()}
+        f = self._name_index.get(fluent)
+        if f is not None:
+            return self[f]
 
 
 class AtomicState(State):
     """A State where the fluents are represented by strings."""
 
     def __init__(self, fluents: Dict[str, bool] = None):
-        self.fluents = fluents if fluents is not None else {}
+        self._fluents = fluents.copy() if fluents is not None else {}
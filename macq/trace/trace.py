@@ -1,13 +1,36 @@
-from collections import defaultdict
+import numpy as np
+from collections import Counter, defaultdict
+from collections.abc import MutableSequence
 from dataclasses import dataclass
-from typing import List, Type, Iterable, Callable, Set
+from operator import attrgetter
+from typing import List, Optional, Type, Callable, Set, Tuple, Union
 from inspect import cleandoc
 from rich.table import Table
 from rich.text import Text
-from . import Action, Step, State
+from . import Action, Fluent, Step, State
 from ..observation import Observation, NoisyPartialDisorderedParallelObservation
 from ..utils import TokenizationError
 
+_default_cost_key = attrgetter("action.cost")
+
+
+def _group_steps(action_ids: np.ndarray, num_actions: int):
+    """Groups the steps of a trace by the action taken in them.
+
+    Args:
+        action_ids (np.ndarray):
+            The id of the action taken in each step.
+        num_actions (int):
+            The number of distinct action ids.
+
+    Returns:
+        The step indices ordered by action id (and ascending within each action),
+        and the positions at which to split them into one group per action id.
+    """
+    order = np.argsort(action_ids, kind="stable")
+    bounds = np.cumsum(np.bincount(action_ids, minlength=num_actions))[:-1]
+    return order, bounds
+
 
 @dataclass
 class SAS:
@@ -23,18 +46,23 @@ class SAS:
         )
 
 
-class Trace:
+class Trace(MutableSequence):
     """A state trace of a planning problem.
 
     A `list`-like object, where each element is a step of the state trace.
+    `append`, `extend`, `pop`, `remove` and `+=` are provided by
+    `MutableSequence` on top of `insert` and item deletion.
 
     Attributes:
-        steps (list):
-            The list of Step objcts constituting the trace.
+        steps (tuple):
+            The Step objcts constituting the trace. Read-only; the trace is
+            edited through its own methods, or by assigning a new list of steps.
         fluents (set):
-            The set of fluents in the trace.
+            The set of fluents in the trace. Kept up to date as steps are
+            added and removed.
         actions (set):
-            The set of actions in the trace.
+            The set of actions in the trace. Kept up to date as steps are
+            added and removed.
     """
 
     class InvalidCostRange(Exception):
@@ -43,7 +71,7 @@ class Trace:
         def __init__(self, message):
             super().__init__(message)
 
-    def __init__(self, steps: List[Step] = None):
+    def __init__(self, steps: Optional[List[Step]] = None):
         """Initializes a Trace with an optional list of steps.
 
         Args:
@@ -51,74 +79,88 @@ class Trace:
                 Optional; The list of steps in the trace. Defaults to an empty
                 `list`.
         """
-        self.steps = steps if steps is not None else []
+        self._steps = list(steps) if steps is not None else []
         self.__reinit_actions_and_fluents()
 
     def __eq__(self, other):
-        return isinstance(other, Trace) and self.steps == other.steps
+        return isinstance(other, Trace) and self._steps == other._steps
 
     def __len__(self):
-        return len(self.steps)
+        return len(self._steps)
 
     def __setitem__(self, key: int, value: Step):
-        self.steps[key] = value
+        if isinstance(key, slice):
+            self._steps[key] = value
+            self.__reinit_actions_and_fluents()
+        else:
+            self.__remove_actions_and_fluents(self._steps[key])
+            self._steps[key] = value
+            self.__update_actions_and_fluents(value)
 
     def __getitem__(self, key: int):
-        return self.steps[key]
+        return self._steps[key]
 
     def __delitem__(self, key: int):
-        del self.steps[key]
+        if isinstance(key, slice):
+            del self._steps[key]
+            self.__reinit_actions_and_fluents()
+        else:
+            self.__remove_actions_and_fluents(self._steps[key])
+            del self._steps[key]
+
+    # MutableSequence also provides __iter__, __reversed__, __contains__, clear,
+    # count, index and reverse; they are delegated to the list instead, to avoid
+    # going through __getitem__ (or, for clear and reverse, updating the fluents and
+    # actions) once per step
 
     def __iter__(self):
-        return iter(self.steps)
+        return iter(self._steps)
 
     def __reversed__(self):
-        return reversed(self.steps)
+        return reversed(self._steps)
 
-    def __contains__(self, step: Step):
-        return step in self.steps
+    def __contains__(self, item: Union[Step, Action]):
+        # actions are looked up in the maintained set rather than by scanning the steps
+        if isinstance(item, Action):
+            return self.contains_action(item)
+        return item in self._steps
 
-    def append(self, step: Step):
-        self.steps.append(step)
-        self.__update_actions_and_fluents(step)
+    def contains_action(self, action: Action):
+        """Checks whether an action is taken in this trace.
+
+        Args:
+            action (Action):
+                The action to look for.
+
+        Returns:
+            True if the action is taken in one of the steps of this trace.
+        """
+        return action in self._actions
 
     def clear(self):
-        self.steps.clear()
-        self.fluents = set()
-        self.actions = set()
+        self._steps.clear()
+        self.__reinit_actions_and_fluents()
 
     def copy(self):
-        return self.steps.copy()
+        return self._steps.copy()
 
     def count(self, value: Step):
-        return self.steps.count(value)
-
-    def extend(self, iterable: Iterable[Step]):
-        self.steps.extend(iterable)
-        for step in iterable:
-            self.__update_actions_and_fluents(step)
+        return self._steps.count(value)
 
     def index(self, value: Step):
-        return self.steps.index(value)
+        return self._steps.index(value)
 
     def insert(self, index: int, item: Step):
-        self.steps.insert(index, item)
+        self._steps.insert(index, item)
         self.__update_actions_and_fluents(item)
 
-    def pop(self):
-        result = self.steps.pop()
-        self.__reinit_actions_and_fluents()
-        return result
-
-    def remove(self, value: Step):
-        self.steps.remove(value)
-        self.__reinit_actions_and_fluents()
-
     def reverse(self):
-        self.steps.reverse()
+        self._steps.reverse()
+        self.__reset_columns()
 
-    def sort(self, reverse: bool = False, key: Callable = lambda e: e.action.cost):
-        self.steps.sort(reverse=reverse, key=key)
+    def sort(self, reverse: bool = False, key: Optional[Callable] = None):
+        self._steps.sort(reverse=reverse, key=key or _default_cost_key)
+        self.__reset_columns()
 
     def details(self, wrap=False):
         indent = " " * 2
@@ -130,8 +172,8 @@ class Trace:
             cleandoc(
                 f"""
             Attributes:
-            {indent}{len(self)} steps
-            {indent}{len(self.fluents)} fluents
+            {indent}{self.num_steps} steps
+            {indent}{self.num_fluents} fluents
             """
             )
         )
@@ -148,7 +190,7 @@ class Trace:
         )
         steps.add_column("Action", overflow="ellipsis", no_wrap=(not wrap))
 
-        for step in self:
+        for step in self._steps:
             action = step.action.details() if step.action else ""
             steps.add_row(str(step.index), step.state.details(), action)
 
@@ -157,6 +199,7 @@ class Trace:
         return details
 
     def colorgrid(self, filter_func=lambda _: True, wrap=True):
+        steps = self._steps
         colorgrid = Table(
             title="Trace", box=None, show_edge=False, pad_edge=False, expand=False
         )
@@ -168,48 +211,78 @@ class Trace:
             "",
             "".join(
                 [
-                    "|" if i < len(self) and (i + 1) % 5 == 0 else " "
-                    for i in range(len(self))
+                    "|" if i < len(steps) and (i + 1) % 5 == 0 else " "
+                    for i in range(len(steps))
                 ]
             ),
         )
 
         static = self.get_static_fluents()
+        # format each fluent once, for both sorting and display
+        names = {f: str(f) for f in self.fluents}
         fluents = list(
             filter(
                 filter_func,
                 sorted(
                     self.fluents,
-                    key=lambda f: float("inf") if f in static else len(str(f)),
+                    key=lambda f: float("inf") if f in static else len(names[f]),
                 ),
             )
         )
 
         for fluent in fluents:
-            step_str = ""
-            for step in self:
-                if step.state[fluent]:
-                    step_str += "[green]"
-                else:
-                    step_str += "[red]"
-                step_str += "■"
+            step_str = "".join(
+                ["[green]■" if step.state[fluent] else "[red]■" for step in steps]
+            )
 
-            colorgrid.add_row(str(fluent), step_str)
+            colorgrid.add_row(names[fluent], step_str)
 
         return colorgrid
 
     def get_static_fluents(self):
         fstates = defaultdict(list)
-        for step in self:
+        for step in self._steps:
             for f, v in step.state.items():
                 fstates[f].append(v)
 
-        static = set()
-        for f, states in fstates.items():
-            if all(states) or not any(states):
-                static.add(f)
+        return {f for f, states in fstates.items() if all(states) or not any(states)}
+
+    @property
+    def steps(self) -> Tuple[Step, ...]:
+        """The steps in the trace, as a tuple.
+
+        The trace keeps its list of steps private, so that the fluents, actions and
+        cached columns cannot fall out of sync with it. The tuple is cached until the
+        trace is modified.
+        """
+        if self._steps_view is None:
+            self._steps_view = tuple(self._steps)
+        return self._steps_view
+
+    @steps.setter
+    def steps(self, steps: List[Step]):
+        self._steps = list(steps)
+        self.__reinit_actions_and_fluents()
 
-        return static
+    @property
+    def num_steps(self) -> int:
+        """The number of steps in the trace."""
+        return len(self._steps)
+
+    @property
+    def fluents(self) -> Set[Fluent]:
+        """The set of fluents in the trace."""
+        return self._fluents
+
+    @property
+    def num_fluents(self) -> int:
+        """The number of fluents in the trace."""
+        return len(self._fluents)
+
+    @property
+    def actions(self) -> Set[Action]:
+        """The set of actions in the trace."""
+        return self._actions
 
     def __update_actions_and_fluents(self, step: Step):
         """Updates the actions and fluents stored in this trace with any new ones from
@@ -219,18 +292,93 @@ class Trace:
             step (Step):
                 The step to extract the possible new fluents and actions from.
         """
-        self.fluents.update(step.state.keys())
+        self.__reset_columns()
+        # count the steps each fluent and action appears in, so they can be
+        # dropped once the last of them is removed
+        self._fluent_counts.update(step.state.keys())
+        self._fluents.update(step.state.keys())
+        if step.action:
+            self._action_counts[step.action] += 1
+            self._actions.add(step.action)
+
+    def __remove_actions_and_fluents(self, step: Step):
+        """Updates the actions and fluents stored in this trace after the provided
+        step is removed, dropping any that no longer appear in the trace.
+
+        Args:
+            step (Step):
+                The step that is removed.
+        """
+        self.__reset_columns()
+        for f in step.state.keys():
+            self._fluent_counts[f] -= 1
+            if not self._fluent_counts[f]:
+                del self._fluent_counts[f]
+                self._fluents.discard(f)
         if step.action:
-            self.actions.add(step.action)
+            self._action_counts[step.action] -= 1
+            if not self._action_counts[step.action]:
+                del self._action_counts[step.action]
+                self._actions.discard(step.action)
 
     def __reinit_actions_and_fluents(self):
         """Reinitializes the actions and fluents stored in this trace, taking all current
         steps into account.
         """
-        self.fluents = set()
-        self.actions = set()
-        for step in self.steps:
+        self._fluent_counts = Counter()
+        self._action_counts = Counter()
+        self._fluents = set()
+        self._actions = set()
+        for step in self._steps:
             self.__update_actions_and_fluents(step)
+        self.__reset_columns()
+
+    def __reset_columns(self):
+        """Resets the per-step columns of this trace, so they are rebuilt on the next
+        query by action or of the costs, and the cached tuple of its steps.
+        """
+        self._steps_view = None
+        self._action_index = None
+        self._cumulative_costs = None
+
+    def __get_columns(self):
+        """Builds the per-step columns of this trace, if it was modified since they were
+        last built.
+
+        The actions are interned in a single pass over the steps, mapping each action
+        (including None, for the last step) to an id. The running total of the costs
+        (`_cumulative_costs`, where entry `i` is the total cost of the actions in the
+        first `i` steps) and the indices of the steps each action is taken in
+        (`_action_index`) are then derived from the ids of the steps with NumPy.
+        """
+        if self._action_index is not None:
+            return
+        intern = {}
+        action_ids = np.fromiter(
+            (intern.setdefault(step.action, len(intern)) for step in self._steps),
+            dtype=np.intp,
+            count=len(self._steps),
+        )
+        actions = list(intern)
+        # the trailing 0 keeps the array integer-typed when the trace is empty
+        costs = np.array([action.cost if action else 0 for action in actions] + [0])
+        order, bounds = _group_steps(action_ids, len(actions))
+
+        self._cumulative_costs = np.cumsum(np.concatenate(([0], costs[action_ids])))
+        self._action_index = {
+            action: indices.tolist()
+            for action, indices in zip(actions, np.split(order, bounds))
+        }
+
+    def __get_action_index(self):
+        """Retrieves the index of the steps each action is taken in.
+
+        Returns:
+            A mapping of each action to the (ascending) indices of the steps it is
+            taken in.
+        """
+        self.__get_columns()
+        return self._action_index
 
     def get_pre_states(self, action: Action):
         """Retrieves the list of states prior to the action in this trace.
@@ -243,11 +391,9 @@ class Trace:
             The set of states prior to the action being performed in this
             trace.
         """
-        prev_states = set()
-        for step in self:
-            if step.action == action:
-                prev_states.add(step.state)
-        return prev_states
+        steps = self._steps
+        indices = self.__get_action_index().get(action, ())
+        return {steps[i].state for i in indices}
 
     def get_post_states(self, action: Action):
         """Retrieves the list of states after the action in this trace.
@@ -259,11 +405,11 @@ class Trace:
         Returns:
             The set of states after the action was performed in this trace.
         """
-        post_states = set()
-        for i, step in enumerate(self):
-            if step.action == action:
-                post_states.add(self[i + 1].state)
-        return post_states
+        steps = self._steps
+        last = len(steps) - 1
+        indices = self.__get_action_index().get(action, ())
+        # an action taken in the last step has no post-state
+        return {steps[i + 1].state for i in indices if i < last}
 
     def get_sas_triples(self, action: Action) -> List[SAS]:
         """Retrieves the list of (S,A,S') triples for the action in this trace.
@@ -279,12 +425,25 @@ class Trace:
             A `SAS` object, containing the `pre_state`, `action`, and
             `post_state`.
         """
-        sas_triples = []
-        for i, step in enumerate(self):
-            if step.action == action:
-                triple = SAS(step.state, action, self[i + 1].state)
-                sas_triples.append(triple)
-        return sas_triples
+        steps = self._steps
+        last = len(steps) - 1
+        indices = self.__get_action_index().get(action, ())
+        # an action taken in the last step has no post-state
+        return [
+            SAS(steps[i].state, action, steps[i + 1].state)
+            for i in indices
+            if i < last
+        ]
+
+    def __get_cumulative_costs(self):
+        """Retrieves the running total of the action costs of this trace.
+
+        Returns:
+            An array where entry `i` is the total cost of the actions in the first
+            `i` steps.
+        """
+        self.__get_columns()
+        return self._cumulative_costs
 
     def get_total_cost(self):
         """Calculates the total cost of this trace.
@@ -292,11 +451,7 @@ class Trace:
         Returns:
             The total cost of all actions performed in the trace.
         """
-        sum = 0
-        for step in self.steps:
-            if step.action:
-                sum += step.action.cost
-        return sum
+        return self.__get_cumulative_costs()[-1].item()
 
     def get_slice_cost(self, start: int, end: int):
         """Calculates the total cost of a slice of this trace.
@@ -311,21 +466,19 @@ class Trace:
         Returns:
             The total cost of the slice of the trace.
         """
-
-        if start < 1 or end < 1 or start > len(self) or end > len(self):
+        n = self.num_steps
+        # check the common (valid) case with a single chained comparison
+        if not 1 <= start <= end <= n:
+            if 1 <= start <= n and 1 <= end <= n:
+                raise self.InvalidCostRange(
+                    "The start boundary must be smaller than the end boundary."
+                )
             raise self.InvalidCostRange(
                 "Range supplied goes out of the feasible range."
             )
-        if start > end:
-            raise self.InvalidCostRange(
-                "The start boundary must be smaller than the end boundary."
-            )
 
-        sum = 0
-        for i in range(start - 1, end):
-            if self[i].action:
-                sum += self[i].action.cost
-        return sum
+        cumulative_costs = self.__get_cumulative_costs()
+        return (cumulative_costs[end] - cumulative_costs[start - 1]).item()
 
     def get_steps(self, action: Action):
         """Retrieves all the Steps in the trace that use the specified action.
@@ -338,11 +491,9 @@ class Trace:
             The set of steps that use the specified action.
 
         """
-        steps = set()
-        for step in self:
-            if step.action == action:
-                steps.add(action)
-        return steps
+        steps = self._steps
+        indices = self.__get_action_index().get(action, ())
+        return {steps[i] for i in indices}
 
     def get_usage(self, action: Action):
         """Calculates how often an action was performed in this trace.
@@ -356,7 +507,7 @@ class Trace:
             as the number of occurences of the action divided by the length of
             the trace (number of steps).
         """
-        return len(self.get_steps(action)) / len(self)
+        return len(self.__get_action_index().get(action, ())) / self.num_steps
 
     def tokenize(self, Token: Type[Observation], **kwargs):
         """Tokenizes the steps in this trace.
@@ -374,4 +525,4 @@ class Trace:
         """
         if Token == NoisyPartialDisorderedParallelObservation:
             raise TokenizationError(Token)
-        return [Token(step=step, **kwargs) for step in self]
+        return [Token(step=step, **kwargs) for step in self._steps]
@@ -103,10 +103,7 @@ class TraceList(MutableSequence):
             calculated as the number of occurences of the action divided by the
             length of the trace (number of steps).
         """
-        usages = []
-        for trace in self:
-            usages.append(trace.get_usage(action))
-        return usages
+        return [trace.get_usage(action) for trace in self]
 
     def get_fluents(self):
         """Retrieves a set of all fluents used in child traces.
@@ -117,7 +114,7 @@ class TraceList(MutableSequence):
         fluents = set()
         for trace in self.traces:
             for step in trace:
-                fluents.update(step.state.fluents)
+                fluents.update(step.state)
         return fluents
 
     def tokenize(
@@ -24,6 +24,7 @@ DEV_DEPENDENCIES = [
     "flake8",
     "black",
     "pre-commit",
+    "numba",
 ]
 
 CLASSIFIERS = [
@@ -1,15 +1,34 @@
 from macq.trace.disordered_parallel_actions_observation_lists import (
+    ActionPair,
     default_theta_vec,
     num_parameters_feature,
     objects_shared_feature,
 )
 from macq.utils.tokenization_errors import TokenizationError
+from macq.extract import amdn
+from macq.extract.amdn import (
+    AMDN,
+    EPS,
+    WMAX,
+    _HARD,
+    _cached_vars,
+    _cnf_pg,
+    add,
+    delete,
+    pre,
+)
 from tests.utils.generators import generate_blocks_traces
 from macq.extract import Extract, modes
 from macq.generate.pddl import *
 from macq.observation import *
 from macq.trace import *
+from nnf import Aux, And, Or, Var
+from nnf.operators import implies
+from collections import Counter
 from pathlib import Path
+import numpy as np
+import pickle
+from types import SimpleNamespace
 import pytest
 
 
@@ -262,3 +281,257 @@ def test_amdn():
     model.to_pddl(
         "model_blocks_dom", "model_blocks_prob", model_blocks_dom, model_blocks_prob
     )
+
+
+def test_amdn_workers():
+    observations = test_tracelist().tokenize(
+        Token=NoisyPartialDisorderedParallelObservation,
+        ObsLists=DisorderedParallelActionsObservationLists,
+        features=[objects_shared_feature, num_parameters_feature],
+        learned_theta=default_theta_vec(2),
+        percent_missing=0,
+        percent_noisy=0,
+        replace=True,
+    )
+    model = Extract(observations, modes.AMDN, debug=False, occ_threshold=2, workers=2)
+    assert model
+
+    def split(constraints):
+        # auxiliary variables are named differently in every process
+        return {
+            c: w
+            for c, w in constraints.items()
+            if not any(isinstance(var.name, Aux) for var in c)
+        }, Counter(constraints.values())
+
+    serial = AMDN._set_all_constraints(observations, 2, False, 1)
+    parallel = AMDN._set_all_constraints(observations, 2, False, 2)
+    assert len(parallel) == len(serial)
+    assert split(parallel) == split(serial)
+
+
+def _amdn_actions(n: int):
+    obj = PlanningObject("object", "o")
+    return [Action(f"a{i}", [obj]) for i in range(n)], Fluent("p", [obj])
+
+
+def test_amdn_soft_parallel_weights():
+    (a, b), r = _amdn_actions(2)
+    together, apart = [{a, b}], [{a}, {b}]
+    obs = SimpleNamespace(
+        all_par_act_sets=[together] * 5 + [apart],
+        action_ids={a: 0, b: 1},
+        pair_probabilities={(0, 1): 0.2},
+    )
+    weights = AMDN._build_soft_parallel_constraints(obs, (r,), workers=1)
+
+    # a constraint repeated over parallel sets and traces gets the sum of its weights
+    assert weights == pytest.approx(
+        {
+            implies(add(r, a), ~delete(r, b)): 5 * 0.8 * WMAX,
+            implies(add(r, b), ~delete(r, a)): (5 * 0.8 + 0.2) * WMAX,
+        }
+    )
+
+
+def test_amdn_cnf_pg():
+    a, b, c = Var("a"), Var("b"), Var("c")
+    cnf = _cnf_pg(Or([And([a, ~b]), And([c])]))
+
+    # each conjunction gets an auxiliary variable that implies each of its literals, and
+    # the top-level clause is the disjunction of the auxiliary variables
+    (clause_c,) = [clause for clause in cnf.children if c in clause.children]
+    (aux_c,) = [~var for var in clause_c.children if var != c]
+    (clause_b,) = [clause for clause in cnf.children if ~b in clause.children]
+    (aux_ab,) = [~var for var in clause_b.children if var != ~b]
+    assert isinstance(aux_c.name, Aux) and isinstance(aux_ab.name, Aux)
+    assert aux_c != aux_ab
+    assert cnf.children == {
+        Or([~aux_ab, a]),
+        Or([~aux_ab, ~b]),
+        Or([~aux_c, c]),
+        Or([aux_ab, aux_c]),
+    }
+
+
+def test_amdn_disorder_shape():
+    (a, b), _ = _amdn_actions(2)
+    obj = PlanningObject("object", "o")
+    propositions = tuple(Fluent(f"p{i}", [obj]) for i in range(3))
+
+    constraints = {}
+    cnf = AMDN._instantiate_disorder_shape(a, b, propositions)
+    AMDN._extract_aux_set_weights(cnf, constraints, 0.25)
+    hard = [c for c, w in constraints.items() if w is _HARD]
+    soft = {c: w for c, w in constraints.items() if w is not _HARD}
+
+    # 9 implications per proposition, one clause per proposition for its auxiliary
+    # variable, and the top-level clause
+    assert len(hard) == 3 * 9 + 3 + 1
+    # as in the Tseitin encoding, every conjunction (4 per proposition) and every
+    # proposition has a weighted auxiliary variable
+    baseline = Or(
+        [
+            Or(
+                [
+                    And([pre(r, a), ~delete(r, a), delete(r, b)]),
+                    And([add(r, a), pre(r, b)]),
+                    And([add(r, a), delete(r, b)]),
+                    And([delete(r, a), add(r, b)]),
+                ]
+            )
+            for r in propositions
+        ]
+    ).to_CNF()
+    baseline_aux = {
+        var.name
+        for clause in baseline.children
+        for var in clause.children
+        if isinstance(var.name, Aux) and var.true
+    }
+    assert len(soft) == len(baseline_aux) == 3 * 4 + 3
+    assert set(soft.values()) == {0.25 * WMAX}
+
+    # with a single proposition, the top-level clause is made up of the conjunctions
+    cnf = AMDN._instantiate_disorder_shape(a, b, propositions[:1])
+    assert len(cnf.children) == 9 + 1
+    (top,) = [
+        clause
+        for clause in cnf.children
+        if all(isinstance(var.name, Aux) and var.true for var in clause)
+    ]
+    assert len(top.children) == 4
+
+
+def test_amdn_count_occurrences():
+    rng = np.random.default_rng(0)
+    for num_actions, num_props, num_states in [(0, 0, 0), (3, 4, 0), (5, 7, 50)]:
+        action_ids = rng.integers(0, max(num_actions, 1), num_states)
+        state_matrix = rng.random((num_states, num_props)) < 0.5
+        expected = np.zeros((num_actions, num_props), dtype=int)
+        np.add.at(expected, action_ids, state_matrix)
+        # the plain kernel, and whichever counter AMDN uses (compiled when Numba is installed)
+        for count in (amdn._count_occurrences, amdn._occurrence_counter()):
+            occurrences = np.zeros((num_actions, num_props), dtype=int)
+            count(occurrences, action_ids, state_matrix)
+            assert (occurrences == expected).all()
+
+
+class _ObservationLists(list):
+    """Hand-made stand-in for the observation lists of the noise constraints."""
+
+    def __init__(self, traces, all_par_act_sets, all_states):
+        super().__init__(traces)
+        self.all_par_act_sets = all_par_act_sets
+        self.all_states = all_states
+
+
+def test_amdn_noise_constraints():
+    (a, b), _ = _amdn_actions(2)
+    obj = PlanningObject("object", "o")
+    r, s = Fluent("r", [obj]), Fluent("s", [obj])
+    only_r, both, only_s = State([r]), State([r, s]), State([s])
+    obs = _ObservationLists(
+        [
+            [Step(only_r, a, 1), Step(both, b, 2), Step(only_s, None, 3)],
+            [Step(only_r, a, 1), Step(only_r, None, 2)],
+        ],
+        all_par_act_sets=[[{a}, {b}], [{a}]],
+        all_states=[[only_r, both, only_s], [only_r, only_r]],
+    )
+    # 6 true propositions in all the tokens
+    w = WMAX / 6
+
+    constraints = AMDN._build_noise_constraints(obs, (r, s), (a, b), 0, False, None)
+    assert constraints == pytest.approx(
+        {
+            # (6) r is true after a twice, s after a and after b once
+            Or([~delete(r, a)]): 2 * w,
+            Or([~delete(s, a)]): w,
+            Or([~delete(s, b)]): w,
+            # (7) s becomes true after {a}, and is true in 2 of the states in between
+            Or([add(s, a)]): 2 * w,
+            # (8) r is true before a twice and before b once, s before b once
+            Or([pre(r, a)]): 2 * w,
+            Or([pre(r, b)]): w,
+            Or([pre(s, b)]): w,
+        }
+    )
+
+    # only (action, proposition) pairs that occur more often than the threshold are kept
+    constraints = AMDN._build_noise_constraints(obs, (r, s), (a, b), 1, False, None)
+    assert constraints == pytest.approx(
+        {
+            Or([~delete(r, a)]): 2 * w,
+            Or([add(s, a)]): 2 * w,
+            Or([pre(r, a)]): 2 * w,
+        }
+    )
+
+
+def test_amdn_pair_probabilities():
+    (a, b, c), _ = _amdn_actions(3)
+    obs = SimpleNamespace(
+        action_ids={a: 0, b: 1, c: 2},
+        probabilities={
+            ActionPair({a, b}): 0.1,
+            ActionPair({c, a}): 0.2,
+            ActionPair({c, b}): 0.3,
+        },
+    )
+    pair_probabilities = (
+        DisorderedParallelActionsObservationLists._get_pair_probabilities(obs)
+    )
+    assert pair_probabilities == {(0, 1): 0.1, (0, 2): 0.2, (1, 2): 0.3}
+
+
+def test_amdn_hard_constraints(monkeypatch):
+    x, y = Var("x"), Var("y")
+    # the hard marker survives being sent to and from worker processes
+    assert pickle.loads(pickle.dumps(_HARD)) is _HARD
+
+    constraints = {Or([x]): _HARD, Or([~x, y]): _HARD, Or([~y]): 0.5}
+    monkeypatch.setattr(
+        AMDN, "_set_all_constraints", staticmethod(lambda *args: constraints)
+    )
+    wcnf, decode = AMDN._solve_constraints(None, 0, False, 1)
+    assert len(wcnf.hard) == 2
+    assert len(wcnf.soft) == 1 and wcnf.wght == [0.5]
+
+
+def test_amdn_aux_weights():
+    (a, b), r = _amdn_actions(2)
+    cnf = AMDN._instantiate_disorder_shape(a, b, (r,))
+
+    # auxiliary variables are only weighed if the pair can be disordered at all
+    for p in (0, EPS / 2):
+        constraints = {}
+        AMDN._extract_aux_set_weights(cnf, constraints, p)
+        assert set(constraints.values()) == {_HARD}
+        assert len(constraints) == len(cnf.children)
+
+    constraints = {}
+    AMDN._extract_aux_set_weights(cnf, constraints, 0.5)
+    soft = [w for w in constraints.values() if w is not _HARD]
+    assert soft == [0.5 * WMAX] * 4
+
+
+def test_amdn_var_caches(monkeypatch):
+    (a,), r = _amdn_actions(1)
+
+    def set_all_constraints(*args):
+        pre(r, a)
+        raise RuntimeError()
+
+    # the caches are cleared even if the extraction fails
+    monkeypatch.setattr(AMDN, "_set_all_constraints", staticmethod(set_all_constraints))
+    with pytest.raises(RuntimeError):
+        AMDN._amdn(None, False, 0, 1)
+    assert not pre.cache_info().currsize
+
+    # and only once the last of the extractions using them is done
+    with _cached_vars():
+        with _cached_vars():
+            add(r, a)
+        assert add.cache_info().currsize == 1
+    assert not add.cache_info().currsize
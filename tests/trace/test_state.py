@@ -1,5 +1,5 @@
 import pytest
-from macq.trace import State
+from macq.trace import State, PartialState
 from tests.utils.generators import generate_test_states, generate_test_fluents
 
 
@@ -24,13 +24,78 @@ def test_state():
     del s1[fluent]
     with pytest.raises(KeyError):
         s1[fluent]
+    assert fluent not in s1
 
     for v in s1.values():
         assert isinstance(v, bool)
 
     s1.clear()
     s1.update(dict(zip(fluents, [i % 2 == 0 for i in range(3)])))
+    assert s1.holds(fluents[0].name)
+    assert not s1.holds(fluents[1].name)
     for f in fluents:
         assert s1.has_key(f)
     for f in s1:
         assert f in fluents
+
+
+def test_state_true_fluents():
+    fluents = generate_test_fluents(3)
+    s = State(dict(zip(fluents, [True, False, True])))
+
+    assert s.true_fluents == {fluents[0], fluents[2]}
+    s[fluents[1]] = True
+    assert s.true_fluents == set(fluents)
+    del s[fluents[0]]
+    assert s.true_fluents == {fluents[1], fluents[2]}
+    s.update({fluents[2]: False})
+    assert s.true_fluents == {fluents[1]}
+    s.clear()
+    assert s.true_fluents == set()
+
+    s = State(fluents[:2])
+    assert s == State({fluents[0]: True, fluents[1]: True})
+    assert s.true_fluents == {fluents[0], fluents[1]}
+
+    # the caches cannot be bypassed through the dict the state was built from
+    d = {fluents[0]: False}
+    s = State(d)
+    assert fluents[0] not in s
+    d[fluents[0]] = True
+    assert fluents[0] not in s
+    assert not s.true_fluents
+    with pytest.raises(TypeError):
+        s.fluents[fluents[0]] = True
+    s.fluents = d
+    assert fluents[0] in s
+    assert s.true_fluents == {fluents[0]}
+
+
+def test_state_str():
+    fluents = generate_test_fluents(2)
+    s = State({fluents[0]: True, fluents[1]: False})
+
+    assert str(s) == str(fluents[0])
+    s[fluents[1]] = True
+    assert str(s) == f"{fluents[0]}, {fluents[1]}"
+    del s[fluents[0]]
+    assert str(s) == str(fluents[1])
+    s.clear()
+    assert str(s) == ""
+
+    # the cached string follows the state, not the dict it was built from
+    d = {fluents[0]: False}
+    s = State(d)
+    assert str(s) == ""
+    d[fluents[0]] = True
+    assert str(s) == ""
+    s.fluents = d
+    assert str(s) == str(fluents[0])
+
+
+def test_partial_state_default():
+    fluent = generate_test_fluents(1)[0]
+    s1 = PartialState()
+    s1[fluent] = None
+    # default-constructed states must not share their fluents
+    assert fluent not in PartialState().fluents
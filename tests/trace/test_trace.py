@@ -63,11 +63,20 @@ def test_trace_get_sas_triples():
     assert isinstance(action2, Action)
     assert trace.get_sas_triples(action2) == [SAS(state2, action2, state3)]
 
+    # an action in the last step has no post-state
+    trace[-1] = Step(state3, action2, 2)
+    assert trace.get_sas_triples(action2) == [SAS(state2, action2, state3)]
+    assert trace.get_post_states(action2) == {state3}
+
 
 # test that the total cost is working correctly
 def test_trace_total_cost():
     trace = generate_test_trace(5)
     assert trace.get_total_cost() == 10
+    # the cost is recalculated after the trace changes
+    trace.pop()
+    trace.pop()
+    assert trace.get_total_cost() == 6
 
 
 # test that the cost range is working correctly
@@ -98,6 +107,44 @@ def test_trace_usage():
     assert trace.get_usage(action1) == 1 / 3
 
 
+# test that queries by action stay correct as the trace changes
+def test_trace_action_queries():
+    trace = generate_test_trace(3)
+    step = trace[0]
+    action1 = step.action
+    assert trace.get_steps(action1) == {step}
+
+    trace.insert(1, step)
+    assert trace.get_usage(action1) == 2 / 4
+    assert trace.get_pre_states(action1) == {step.state}
+    trace.append(step)
+    assert trace.get_usage(action1) == 3 / 5
+    trace.pop()
+    assert trace.get_usage(action1) == 2 / 4
+
+
+# test that the cached queries cannot be bypassed through the steps attribute
+def test_trace_steps_attribute():
+    steps = generate_test_steps(5)
+    trace = Trace(steps)
+    assert trace.get_total_cost() == 10
+    steps.pop()
+    assert trace.get_total_cost() == 10
+    assert trace.num_steps == 5
+    # the steps are read-only
+    with pytest.raises(AttributeError):
+        trace.steps.pop()
+    with pytest.raises(TypeError):
+        trace.steps[0] = trace[1]
+    assert trace.steps is trace.steps
+
+    action1 = trace[0].action
+    trace.steps = trace.steps[:3] + (trace[0],)
+    assert trace.get_total_cost() == 7
+    assert trace.get_usage(action1) == 2 / 4
+    assert trace.actions == {step.action for step in trace if step.action}
+
+
 # test trace tokenize function
 def test_trace_tokenize():
     trace = generate_test_trace(3)
@@ -112,6 +159,31 @@ def test_trace_tokenize():
     assert observations != step1
 
 
+# test that the fluents and actions are kept up to date as the trace changes
+def test_trace_fluents_and_actions():
+    trace = generate_test_trace(3)
+    step = trace[0]
+    (fluents, actions) = (set(trace.fluents), set(trace.actions))
+    assert step.action in trace.actions
+    assert step.action in trace
+
+    del trace[0]
+    assert step.action not in trace.actions
+    assert not trace.contains_action(step.action)
+    trace.insert(0, step)
+    assert trace.fluents == fluents
+    assert trace.actions == actions
+
+    trace.extend(iter(generate_test_steps(2)))
+    assert len(trace.actions) == len(actions) + 1
+    assert trace.num_steps == 5
+    assert trace.num_fluents == len(trace.fluents)
+    trace.clear()
+    assert not trace.fluents
+    assert trace.num_fluents == 0
+    assert not trace.actions
+
+
 def test_trace_rep():
     trace = generate_test_trace(3)
     assert trace.details()
@@ -132,11 +204,11 @@ def test_trace_list_methods():
     assert trace[0] != step
     assert step not in trace
 
-    rev = list(reversed(trace))
+    rev = tuple(reversed(trace))
     trace.reverse()
     assert trace.steps == rev
     assert trace.pop() not in trace
-    assert trace.steps == trace.copy()
+    assert list(trace.steps) == trace.copy()
 
     trace.extend(steps)
     for s in steps: